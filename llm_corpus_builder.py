@@ -4,17 +4,34 @@ from __future__ import annotations
 import argparse
 import hashlib
 import json
+import os
 import re
 import shutil
+import socket
 import subprocess
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime
+from functools import lru_cache, partial
 from pathlib import Path
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator, Set, Tuple, Union
 
 import yaml
 from tqdm import tqdm
 
+try:
+    from yaml import CSafeDumper as SafeDumper, CSafeLoader as SafeLoader
+except ImportError:  # PyYAML compilé sans libyaml
+    from yaml import SafeDumper, SafeLoader
+
+try:
+    import orjson
+except ImportError:  # optionnel : repli sur json
+    orjson = None
+
 # =========================
 # Utils
 # =========================
@@ -26,8 +43,13 @@ def run(cmd: List[str], cwd: Optional[Path] = None) -> None:
     if p.returncode != 0:
         raise RuntimeError(f"Command failed: {' '.join(cmd)}")
 
-def sha1_short(text: str, n: int = 10) -> str:
-    return hashlib.sha1(text.encode("utf-8", errors="ignore")).hexdigest()[:n]
+def short_id(data: bytes, n: int = 10) -> str:
+    # Identifiant de fichier, pas un usage cryptographique : BLAKE2 est plus
+    # rapide que SHA-1 et fait partie de hashlib
+    return hashlib.blake2b(data, digest_size=16).hexdigest()[:n]
+
+_SLUG_NONWORD_RE = re.compile(r"[^\w\s-]")
+_SLUG_SEP_RE = re.compile(r"[\s_-]+")
 
 def slugify(s: str, max_length: int = 80) -> str:
     """Slugify a string and limit its length to avoid filesystem issues.
@@ -36,8 +58,8 @@ def slugify(s: str, max_length: int = 80) -> str:
     We use 80 chars for each slug component to stay well under the limit.
     """
     s = s.strip().lower()
-    s = re.sub(r"[^\w\s-]", "", s)
-    s = re.sub(r"[\s_-]+", "-", s)
+    s = _SLUG_NONWORD_RE.sub("", s)
+    s = _SLUG_SEP_RE.sub("-", s)
     s = s.strip("-") or "section"
 
     # Limit length and add ellipsis if truncated
@@ -50,31 +72,81 @@ def now_iso() -> str:
     from datetime import timezone
     return datetime.now(timezone.utc).replace(microsecond=0).isoformat().replace('+00:00', 'Z')
 
-def ensure_dir(p: Path) -> None:
-    p.mkdir(parents=True, exist_ok=True)
+def jsonl_line(record: Dict[str, Any]) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(record) + b"\n"
+    # Même sortie compacte qu'orjson : le manifest ne dépend pas de son installation
+    return (json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+def file_digest(path: Path) -> str:
+    with open(path, "rb") as f:
+        if hasattr(hashlib, "file_digest"):  # Python >= 3.11
+            return hashlib.file_digest(f, "blake2b").hexdigest()
+        h = hashlib.blake2b()
+        for block in iter(lambda: f.read(1 << 16), b""):
+            h.update(block)
+        return h.hexdigest()
+
+# Dossiers déjà créés par ce processus : évite un mkdir par fichier
+_made_dirs: Set[str] = set()
+
+def ensure_dir(p: Union[str, Path]) -> None:
+    s = str(p)
+    if s in _made_dirs:
+        return
+    os.makedirs(s, exist_ok=True)
+    _made_dirs.add(s)
 
 # =========================
 # Exclusion intelligente
 # =========================
 
-def is_artifact_dir(path: Path, excluded_names: List[str]) -> bool:
-    for part in path.parts:
-        if part in excluded_names:
-            # Si le dossier contient de la doc, on ne l'exclut pas
-            candidate = Path(*path.parts[:path.parts.index(part)+1])
-            try:
-                for f in candidate.rglob("*"):
-                    if f.suffix.lower() in DOC_EXTS:
-                        return False
-            except Exception:
-                pass
-            return True
-    return False
+def find_artifact_dirs(root: Path, excluded_names: List[str]) -> Set[Path]:
+    """Retourne les dossiers exclus (nom dans excluded_names) sans aucune doc.
+
+    Un seul parcours ascendant de l'arbre : quand un dossier est visité, on
+    sait déjà si l'un de ses sous-dossiers contient de la doc.
+    """
+    names = set(excluded_names)
+    has_doc: Dict[str, bool] = {}
+    artifacts: Set[Path] = set()
+    for dirpath, dirnames, filenames in os.walk(root, topdown=False):
+        found = (
+            any(os.path.splitext(f)[1].lower() in DOC_EXTS for f in filenames)
+            or any(has_doc.get(os.path.join(dirpath, d), False) for d in dirnames)
+        )
+        has_doc[dirpath] = found
+        # Si le dossier contient de la doc, on ne l'exclut pas
+        if not found and os.path.basename(dirpath) in names:
+            artifacts.add(Path(dirpath))
+    return artifacts
+
+def iter_docs(root: Path, artifact_dirs: Set[Path]) -> Iterator[Path]:
+    """Parcourt root avec os.scandir et ne produit que les fichiers de doc.
+
+    Les dossiers d'artefacts sont élagués sans être visités, et aucun Path
+    n'est construit pour les fichiers ignorés.
+    """
+    pruned = {str(p) for p in artifact_dirs}
+    stack = [str(root)]
+    while stack:
+        d = stack.pop()
+        with os.scandir(d) as it:
+            for e in it:
+                if e.is_dir(follow_symlinks=False):
+                    if e.path not in pruned:
+                        stack.append(e.path)
+                elif e.is_file():
+                    name = e.name
+                    dot = name.rfind(".")
+                    if dot > 0 and name[dot:].lower() in DOC_EXTS:
+                        yield Path(e.path)
 
 # =========================
 # Conversion via Pandoc
 # =========================
 
+# None : pas de conversion, le fichier est lu tel quel
 PANDOC_FORMATS = {
     ".md": None,
     ".mdx": ("markdown", "gfm"),
@@ -87,25 +159,48 @@ PANDOC_FORMATS = {
     ".htm": ("html", "gfm"),
 }
 
-def convert_to_md(src: Path, dst: Path) -> bool:
-    ext = src.suffix.lower()
-    ensure_dir(dst.parent)
-
-    if ext == ".md":
-        shutil.copy2(src, dst)
-        return True
-
-    if ext not in PANDOC_FORMATS:
-        return False
+def read_source(src: Path) -> str:
+    # Comme la CLI pandoc : UTF-8 strict, sinon latin-1, pour ne pas perdre
+    # les accents des sources anciennes (docbook, html, rst en cp1252...)
+    data = src.read_bytes()
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        return data.decode("latin-1")
+
+def convert_to_md(src: Path, server_url: Optional[str] = None) -> Optional[str]:
+    """Retourne le Markdown de src, ou None si la conversion a échoué."""
+    fmt = PANDOC_FORMATS.get(src.suffix.lower())
+    if fmt is None:
+        return None
+
+    from_fmt, to_fmt = fmt
+
+    if server_url:
+        params = {
+            "from": from_fmt,
+            "to": to_fmt,
+            "text": read_source(src),
+            "wrap": "none",
+        }
+        try:
+            result = pandoc_request(server_url, "/", params, timeout=30)
+        except urllib.error.HTTPError as e:
+            err = e.read().decode("utf-8", errors="ignore")
+            if "UnresolvedEntityException" not in err:
+                print(f"Warning converting {src.name}: {err[:200]}")
+            return None
+        except Exception as e:
+            print(f"Error converting {src.name}: {str(e)[:200]}")
+            return None
+        return result["output"]
 
-    from_fmt, to_fmt = PANDOC_FORMATS[ext]
     cmd = [
         "pandoc", str(src),
         "-f", from_fmt,
         "-t", to_fmt,
         "--wrap=none",
         "--markdown-headings=atx",
-        "-o", str(dst)
     ]
     try:
         # Utiliser subprocess.run avec capture d'erreur
@@ -113,7 +208,8 @@ def convert_to_md(src: Path, dst: Path) -> bool:
             cmd,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
-            text=True,
+            encoding="utf-8",
+            errors="ignore",
             timeout=30  # timeout de 30 secondes par fichier
         )
 
@@ -122,34 +218,132 @@ def convert_to_md(src: Path, dst: Path) -> bool:
             # Ne pas afficher les erreurs "UnresolvedEntityException" pour réduire le bruit
             if "UnresolvedEntityException" not in result.stderr:
                 print(f"Warning converting {src.name}: {result.stderr[:200]}")
-            return False
+            return None
 
-        return True
+        return result.stdout
     except subprocess.TimeoutExpired:
         print(f"Timeout converting {src.name}")
-        return False
+        return None
     except Exception as e:
         print(f"Error converting {src.name}: {str(e)[:200]}")
-        return False
+        return None
+
+# Conversion par lots : un lot par tâche de worker, converti en une seule
+# requête /batch au serveur pandoc. Les lots restent petits pour occuper tous
+# les workers. Sans serveur, chaque fichier a son propre appel pandoc :
+# concaténer les sources sur stdin ne donne pas le même résultat que des
+# conversions séparées (<base href> html, liens et notes markdown, titres
+# rst, macros latex... fuient d'un fichier à l'autre).
+BATCH_SIZE = 16
+
+def _convert_batch_server(texts: List[str], from_fmt: str, server_url: str) -> Optional[List[str]]:
+    # /batch convertit chaque document séparément, quel que soit le format
+    params = [{"from": from_fmt, "to": "gfm", "text": t, "wrap": "none"} for t in texts]
+    try:
+        results = pandoc_request(server_url, "/batch", params, timeout=30 * len(texts))
+    except Exception:
+        return None
+    return [r["output"] for r in results]
+
+def convert_batch(srcs: List[Path], from_fmt: str,
+                  server_url: Optional[str] = None) -> List[Optional[str]]:
+    outputs = None
+    if len(srcs) > 1 and server_url:
+        texts = [read_source(src) for src in srcs]
+        outputs = _convert_batch_server(texts, from_fmt, server_url)
+
+    # Lot rejeté (fichier invalide...) ou pas de serveur : fichier par fichier
+    if outputs is None or len(outputs) != len(srcs):
+        return [convert_to_md(src, server_url) for src in srcs]
+    return outputs
+
+# =========================
+# Pandoc server (pandoc >= 3)
+# =========================
+
+# Le serveur applique un seul timeout par requête : il doit couvrir un /batch
+# complet, auquel le client accorde 30 s par document
+SERVER_TIMEOUT = 30 * BATCH_SIZE
+
+# Le serveur est local : ne jamais passer par un éventuel proxy HTTP
+_local_http = urllib.request.build_opener(urllib.request.ProxyHandler({}))
+
+def pandoc_request(server_url: str, path: str, body: Any, timeout: float) -> Any:
+    req = urllib.request.Request(
+        server_url + path,
+        data=json.dumps(body).encode("utf-8"),
+        headers={"Content-Type": "application/json", "Accept": "application/json"},
+    )
+    with _local_http.open(req, timeout=timeout) as resp:
+        return json.loads(resp.read())
+
+def start_pandoc_server(startup_timeout: float = 10.0) -> Optional[Tuple[subprocess.Popen, str]]:
+    """Lance `pandoc server` sur un port libre et attend qu'il réponde.
+
+    Retourne None si pandoc ne connaît pas le mode serveur (pandoc < 3).
+    """
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+
+    try:
+        proc = subprocess.Popen(
+            ["pandoc", "server", "--port", str(port), "--timeout", str(SERVER_TIMEOUT)],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+    except OSError:
+        return None
+
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + startup_timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            return None
+        try:
+            with _local_http.open(url + "/version", timeout=1):
+                return proc, url
+        except OSError:
+            time.sleep(0.1)
+
+    stop_pandoc_server(proc)
+    return None
+
+def stop_pandoc_server(proc: subprocess.Popen) -> None:
+    proc.terminate()
+    try:
+        proc.wait(timeout=5)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
 
 # =========================
 # Nettoyage Markdown
 # =========================
 
+# Blocs <script>/<style> et attributs pandoc {#...}, supprimés en une passe
+_STRIP_RE = re.compile(r"<(script|style)[\s\S]*?</\1>|\{#.*?\}", re.I)
+_NL3_RE = re.compile(r"\n{3,}")
+
 def clean_md(text: str) -> str:
-    text = text.replace("\r\n", "\n").replace("\r", "\n")
-    text = re.sub(r"<(script|style)[\s\S]*?</\1>", "", text, flags=re.I)
-    text = re.sub(r"\{#.*?\}", "", text)
-    text = re.sub(r"\n{3,}", "\n\n", text)
+    # La plupart des fichiers n'ont aucun \r : un seul balayage suffit alors
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    text = _STRIP_RE.sub("", text)
+    # Après la suppression, qui peut elle-même créer des lignes vides
+    text = _NL3_RE.sub("\n\n", text)
     return text.strip() + "\n"
 
 # =========================
 # Découpage par sections
 # =========================
 
+@lru_cache(maxsize=8)
+def _header_re(max_level: int) -> re.Pattern:
+    return re.compile(rf"^(#{{1,{max_level}}})\s+(.+)$", re.MULTILINE)
+
 def split_by_headers(md: str, max_level: int):
-    header_re = re.compile(rf"^(#{{1,{max_level}}})\s+(.+)$", re.MULTILINE)
-    matches = list(header_re.finditer(md))
+    matches = list(_header_re(max_level).finditer(md))
 
     if not matches:
         return [{"title": "root", "level": 0, "content": md.strip()}]
@@ -169,13 +363,44 @@ def split_by_headers(md: str, max_level: int):
 # Git
 # =========================
 
+# Motifs sparse-checkout insensibles à la casse, ex. "*.[mM][dD]"
+SPARSE_PATTERNS = [
+    "*" + "".join(f"[{c.lower()}{c.upper()}]" if c.isalpha() else c for c in ext)
+    for ext in sorted(DOC_EXTS)
+]
+
+# Clones simultanés, à garder raisonnable pour ne pas saturer les serveurs
+GIT_JOBS = 8
+
 def git_clone_or_pull(url: str, dest: Path) -> None:
     if dest.exists() and (dest / ".git").exists():
-        run(["git", "fetch", "--depth=1"], cwd=dest)
+        run(["git", "fetch", "--depth=1", "--filter=blob:none", "--no-tags"], cwd=dest)
         run(["git", "reset", "--hard", "origin/HEAD"], cwd=dest)
     else:
         ensure_dir(dest.parent)
-        run(["git", "clone", "--depth=1", url, str(dest)])
+        # Clone partiel sans blobs : seuls ceux des fichiers de doc extraits
+        # par le sparse-checkout sont téléchargés
+        run([
+            "git", "clone",
+            "--filter=blob:none", "--depth=1", "--single-branch", "--no-tags",
+            "--no-checkout", url, str(dest),
+        ])
+        try:
+            run(["git", "sparse-checkout", "set", "--no-cone", *SPARSE_PATTERNS], cwd=dest)
+            run(["git", "checkout"], cwd=dest)
+        except Exception:
+            # Sinon le prochain fetch + reset --hard ferait un checkout complet
+            shutil.rmtree(dest, ignore_errors=True)
+            raise
+
+def try_clone_or_pull(url: str, dest: Path) -> bool:
+    # Un dépôt injoignable ou renommé ne doit pas interrompre tout le corpus
+    try:
+        git_clone_or_pull(url, dest)
+        return True
+    except Exception as e:
+        print(f"Error updating {dest.name}: {str(e)[:200]}")
+        return False
 
 def get_git_sha(repo_dir: Path) -> str:
     try:
@@ -188,7 +413,7 @@ def get_git_sha(repo_dir: Path) -> str:
 # =========================
 
 def yaml_front_matter(meta: Dict[str, Any]) -> str:
-    return f"---\n{yaml.safe_dump(meta, sort_keys=False)}---\n\n"
+    return f"---\n{yaml.dump(meta, Dumper=SafeDumper, sort_keys=False)}---\n\n"
 
 # =========================
 # Main Builder
@@ -203,8 +428,69 @@ class RepoConfig:
     versions: List[str]
     source: str = "official"
 
-def main():
-    cfg = yaml.safe_load(Path("repos.yaml").read_text())
+def md_relpath(rel: str) -> str:
+    # rel porte toujours une extension de doc (cf. iter_docs)
+    return rel[:rel.rfind(".")] + ".md"
+
+def manifest_record(rel: str, md_rel: str, md: str, repo: RepoConfig, version: str, sha: str,
+                    generated_at: str) -> Dict[str, Any]:
+    # Ordre des clés du manifest : id, file et text en tête, puis les métadonnées
+    return {
+        "id": f"{repo.id}:{version}:{short_id(os.fsencode(rel))}",
+        "file": md_rel,
+        "text": md,
+        "repo": repo.id,
+        "tech": repo.tech,
+        "version": version,
+        "source": repo.source,
+        "git_sha": sha,
+        "file_path": md_rel,
+        "original_file": rel,
+        "generated_at": generated_at
+    }
+
+def process_one(rel: str, md_rel: str, dst: str, raw_md: str, repo: RepoConfig, version: str,
+                sha: str, generated_at: str) -> Dict[str, Any]:
+    md = clean_md(raw_md)
+    with open(dst, "w", encoding="utf-8") as f:
+        f.write(md)
+    return manifest_record(rel, md_rel, md, repo, version, sha, generated_at)
+
+def process_batch(srcs: List[Path], repo_dir: Path, base_out: Path, repo: RepoConfig,
+                  version: str, sha: str, generated_at: str,
+                  pandoc_url: Optional[str] = None) -> List[Optional[Dict[str, Any]]]:
+    """Convertit un lot de fichiers de même extension (exécuté dans un worker).
+
+    Retourne un enregistrement de manifest par fichier, None si la conversion a échoué.
+    """
+    fmt = PANDOC_FORMATS[srcs[0].suffix.lower()]
+    if fmt is None:
+        # .md : déjà du Markdown, lu directement sans passer par pandoc
+        outputs = [src.read_text(encoding="utf-8", errors="ignore") for src in srcs]
+    else:
+        outputs = convert_batch(srcs, fmt[0], pandoc_url)
+
+    # Chemins de sortie en str plutôt qu'en arithmétique de Path : srcs vient
+    # de iter_docs, donc commence toujours par str(repo_dir) + "/"
+    prefix = len(str(repo_dir)) + 1
+    base_out_str = str(base_out)
+    records: List[Optional[Dict[str, Any]]] = []
+    for src, raw_md in zip(srcs, outputs):
+        if raw_md is None:
+            records.append(None)
+            continue
+        rel = str(src)[prefix:]
+        md_rel = md_relpath(rel)
+        # Preserve exact GitHub structure in output
+        dst = os.path.join(base_out_str, md_rel)
+        ensure_dir(os.path.dirname(dst))
+        records.append(process_one(rel, md_rel, dst, raw_md, repo, version, sha, generated_at))
+    return records
+
+def build_corpus(pandoc_url: Optional[str] = None, jobs: Optional[int] = None) -> None:
+    # Un seul horodatage pour toute la construction du corpus
+    generated_at = now_iso()
+    cfg = yaml.load(Path("repos.yaml").read_bytes(), Loader=SafeLoader)
     output_root = Path(cfg["output_root"])
     work_root = Path(cfg["work_root"])
     defaults = cfg["defaults"]
@@ -215,14 +501,26 @@ def main():
     ensure_dir(output_root)
     ensure_dir(work_root)
 
-    for r in cfg["repos"]:
-        repo = RepoConfig(**r)
+    repos = [RepoConfig(**r) for r in cfg["repos"]]
+
+    # Phase 1 : clones/mises à jour en parallèle. Git attend le réseau et
+    # subprocess.run libère le GIL, des threads suffisent. Un seul clone par
+    # id, chaque dépôt ayant son propre dossier de travail.
+    by_id = {repo.id: repo for repo in repos}
+    with ThreadPoolExecutor(max_workers=GIT_JOBS) as ex:
+        ok = ex.map(lambda repo: try_clone_or_pull(repo.url, work_root / repo.id), by_id.values())
+        ready = {repo_id for repo_id, success in zip(by_id, ok) if success}
+
+    # Phase 2 : conversion, en sautant les dépôts dont le clone a échoué
+    for repo in repos:
+        if repo.id not in ready:
+            print(f"\n### Skipping {repo.id} (clone/update failed)")
+            continue
 
         for version in repo.versions:
             print(f"\n### Processing {repo.id} (version: {version})")
 
             repo_dir = work_root / repo.id
-            git_clone_or_pull(repo.url, repo_dir)
             sha = get_git_sha(repo_dir)
 
             # Output directory preserving GitHub structure
@@ -230,50 +528,110 @@ def main():
             ensure_dir(base_out)
 
             manifest = base_out / "manifest.jsonl"
-            mf = manifest.open("w", encoding="utf-8")
-
-            files = []
-            for f in repo_dir.rglob("*"):
-                if not f.is_file():
-                    continue
-                if is_artifact_dir(f, excluded_names):
-                    continue
-                if f.suffix.lower() in DOC_EXTS:
-                    files.append(f)
-
-            for src in tqdm(files, desc=f"{repo.id}/{version}"):
-                rel = src.relative_to(repo_dir)
-                # Preserve exact GitHub structure in output
-                dst = base_out / rel.with_suffix(".md")
-                ok = convert_to_md(src, dst)
-                if not ok:
+            mf = manifest.open("wb")
+
+            artifact_dirs = find_artifact_dirs(repo_dir, excluded_names)
+            files = list(iter_docs(repo_dir, artifact_dirs))
+
+            # Contenus identiques (docs recopiées dans plusieurs sous-projets) :
+            # seul le premier fichier est converti, les doublons réutilisent son
+            # texte. Les .md ne passent pas par pandoc, inutile de les hacher.
+            seen: Dict[Tuple[str, str], Path] = {}
+            duplicates: Dict[Path, Path] = {}
+            unique = []
+            for f in files:
+                ext = f.suffix.lower()
+                if PANDOC_FORMATS[ext] is None:
+                    unique.append(f)
                     continue
-
-                md = clean_md(dst.read_text(encoding="utf-8", errors="ignore"))
-                dst.write_text(md, encoding="utf-8")
-
-                # Add metadata to manifest
-                meta = {
-                    "repo": repo.id,
-                    "tech": repo.tech,
-                    "version": version,
-                    "source": repo.source,
-                    "git_sha": sha,
-                    "file_path": str(rel.with_suffix(".md")),
-                    "original_file": str(rel),
-                    "generated_at": now_iso()
-                }
-
-                mf.write(json.dumps({
-                    "id": f"{repo.id}:{version}:{sha1_short(str(rel))}",
-                    "file": str(rel.with_suffix(".md")),
-                    "text": md,
-                    **meta
-                }, ensure_ascii=False) + "\n")
+                first = seen.setdefault((ext, file_digest(f)), f)
+                if first is f:
+                    unique.append(f)
+                else:
+                    duplicates[f] = first
+
+            # Regrouper par extension : chaque lot part en un seul appel pandoc,
+            # les lots sont répartis sur les workers
+            buckets: Dict[str, List[Path]] = {}
+            for f in unique:
+                buckets.setdefault(f.suffix.lower(), []).append(f)
+            chunks = [
+                srcs[i:i + BATCH_SIZE]
+                for srcs in buckets.values()
+                for i in range(0, len(srcs), BATCH_SIZE)
+            ]
+
+            work = partial(
+                process_batch,
+                repo_dir=repo_dir, base_out=base_out, repo=repo,
+                version=version, sha=sha, generated_at=generated_at,
+                pandoc_url=pandoc_url,
+            )
+            originals = set(duplicates.values())
+            converted: Dict[Path, str] = {}
+            # Seul le parent écrit dans le manifest
+            with ProcessPoolExecutor(max_workers=jobs) as ex, \
+                    tqdm(total=len(files), desc=f"{repo.id}/{version}",
+                         mininterval=0.5, smoothing=0.05) as bar:
+                for chunk, records in zip(chunks, ex.map(work, chunks)):
+                    bar.update(len(records))
+                    for src, rec in zip(chunk, records):
+                        if rec:
+                            mf.write(jsonl_line(rec))
+                            if src in originals:
+                                converted[src] = rec["text"]
+
+                prefix = len(str(repo_dir)) + 1
+                base_out_str = str(base_out)
+                for dup, first in duplicates.items():
+                    bar.update(1)
+                    md = converted.get(first)
+                    if md is None:
+                        continue
+                    rel = str(dup)[prefix:]
+                    md_rel = md_relpath(rel)
+                    dst = os.path.join(base_out_str, md_rel)
+                    ensure_dir(os.path.dirname(dst))
+                    with open(dst, "w", encoding="utf-8") as f:
+                        f.write(md)
+                    mf.write(jsonl_line(manifest_record(rel, md_rel, md, repo, version, sha, generated_at)))
 
             mf.close()
 
     print("\n✅ Corpus LLM prêt :", output_root.resolve())
 
+def positive_int(value: str) -> int:
+    n = int(value)
+    if n < 1:
+        raise argparse.ArgumentTypeError(f"doit être >= 1 (reçu {value})")
+    return n
+
+def parse_args() -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="Construit un corpus Markdown à partir de dépôts de documentation.")
+    ap.add_argument(
+        "--no-server", action="store_true",
+        help="Appeler la CLI pandoc au lieu de `pandoc server` (pandoc < 3)",
+    )
+    ap.add_argument(
+        "--jobs", "-j", type=positive_int, default=os.cpu_count(),
+        help="Nombre de processus de conversion (défaut : nombre de CPU)",
+    )
+    return ap.parse_args()
+
+def main():
+    args = parse_args()
+
+    server = None
+    if not args.no_server:
+        server = start_pandoc_server()
+        if server is None:
+            print("pandoc server indisponible, repli sur la CLI pandoc")
+
+    try:
+        build_corpus(server[1] if server else None, args.jobs)
+    finally:
+        if server:
+            stop_pandoc_server(server[0])
+
 if __name__ == "__main__":
     main()